@@ -0,0 +1,78 @@
+"""
+Shared HTTPS connections for the SurfCheck scripts.
+Keeps one keep-alive connection per host so repeated NOAA fetches
+reuse the same TCP+TLS session.
+"""
+
+import functools
+import http.client
+import time
+from urllib.parse import urljoin, urlsplit
+
+USER_AGENT = "SurfCheck/1.0"
+TIMEOUT = 30
+RETRIES = 3
+BACKOFF = 0.3
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+_conns = {}
+
+def _conn(host):
+    conn = _conns.get(host)
+    if conn is None:
+        conn = _conns[host] = http.client.HTTPSConnection(host, timeout=TIMEOUT)
+    return conn
+
+@functools.lru_cache(maxsize=64)
+def _split(url):
+    """Split a URL into (host, request path) once per distinct URL."""
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise ValueError(f"Only https URLs are supported: {url}")
+    path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+    return parts.netloc, path
+
+def _get_once(url, headers):
+    host, path = _split(url)
+    for attempt in range(RETRIES + 1):
+        conn = _conn(host)
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.HTTPException, OSError):
+            # Stale keep-alive socket or network blip; reconnect on the next try
+            conn.close()
+            if attempt == RETRIES:
+                raise
+        else:
+            if resp.status < 500 or attempt == RETRIES:
+                return resp.status, resp.headers, body
+        time.sleep(BACKOFF * 2 ** attempt)
+
+def get(url, headers=None):
+    """
+    GET a URL over the pooled connection, retrying transient failures and
+    following redirects. Returns (status, response headers, body);
+    non-200 statuses are not raised.
+    """
+    headers = {"User-Agent": USER_AGENT, **(headers or {})}
+    for _ in range(MAX_REDIRECTS + 1):
+        status, resp_headers, body = _get_once(url, headers)
+        location = resp_headers.get("Location")
+        if status not in REDIRECT_STATUSES or not location:
+            return status, resp_headers, body
+        url = urljoin(url, location)
+    raise RuntimeError(f"GET {url} failed: more than {MAX_REDIRECTS} redirects")
+
+def fetch_bytes(url):
+    """GET a URL, raising unless the server answers 200."""
+    status, _, body = get(url)
+    if status != 200:
+        raise RuntimeError(f"GET {url} failed: HTTP {status}")
+    return body
+
+def fetch_text(url):
+    """GET a URL and decode it as text."""
+    return fetch_bytes(url).decode("utf-8", errors="replace")
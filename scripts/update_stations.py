@@ -4,13 +4,22 @@ Fetch NDBC station list and generate data/stations.json.
 Only includes stations with buoy-type hulls (likely to have wave data).
 """
 
+import argparse
+import functools
+import hashlib
 import json
+import os
 import re
-import urllib.request
 from pathlib import Path
 
+from _http import get
+
 URL = "https://www.ndbc.noaa.gov/data/stations/station_table.txt"
 OUT = Path(__file__).resolve().parent.parent / "data" / "stations.json"
+# ETag/Last-Modified of the table that produced OUT, for conditional GETs
+META = OUT.parent / ".stations.meta.json"
+# Fingerprint of this script; any change to the parser or filters forces a rebuild
+PARSER_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
 
 BUOY_TYPES = {"3-meter discus buoy", "buoy", "atlas buoy", "dart ii", "dart 4g",
               "6-meter nomad", "discus buoy", "6-meter foam buoy",
@@ -18,43 +27,77 @@ BUOY_TYPES = {"3-meter discus buoy", "buoy", "atlas buoy", "dart ii", "dart 4g",
               "ocean racing buoy", "wave rider", "waverider", "datawell",
               "3-meter foam buoy", "ocean buoy"}
 
-def parse_location(loc_str):
-    """Parse '12.000 N 23.000 W' into (lat, lon)."""
-    m = re.match(r'([\d.]+)\s*([NS])\s+([\d.]+)\s*([EW])', loc_str)
-    if not m:
-        return None, None
-    lat = float(m.group(1)) * (1 if m.group(2) == 'N' else -1)
-    lon = float(m.group(3)) * (1 if m.group(4) == 'E' else -1)
-    return lat, lon
+# One table row: STATION_ID|OWNER|TTYPE|HULL|NAME|PAYLOAD|LOCATION|...
+# Captures id, type, name and the decimal lat/lon at the start of LOCATION.
+LINE_RE = re.compile(
+    rb'^[ \t]*([^#|\s][^|\s]*)[ \t]*\|[^|\n]*\|([^|\n]*)\|[^|\n]*\|([^|\n]*)\|[^|\n]*\|'
+    rb'[ \t]*([\d.]+)[ \t]*([NS])[ \t]+([\d.]+)[ \t]*([EW])',
+    re.M,
+)
+
+@functools.lru_cache(maxsize=None)
+def is_buoy_type(ttype):
+    """True if a hull type is likely to carry wave sensors."""
+    if not ttype:
+        return False
+    t = ttype.lower()
+    # Also accept if "buoy" appears in the type string
+    return t in BUOY_TYPES or "buoy" in t or "dart" in t or "rider" in t
+
+def load_meta():
+    """Cache validators from the last run, or {} if OUT needs a full rebuild."""
+    if not OUT.exists():
+        return {}
+    try:
+        meta = json.loads(META.read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(meta, dict) or meta.get("parser_version") != PARSER_VERSION:
+        return {}
+    return meta
 
-def main():
+def write_json(path, obj):
+    """Write to a sibling temp file and swap it in so readers never see a partial file."""
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with tmp.open("w") as f:
+            json.dump(obj, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def main(force=False):
     print("Fetching NDBC station table...")
-    req = urllib.request.Request(URL, headers={"User-Agent": "SurfCheck/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        text = resp.read().decode("utf-8", errors="replace")
+    meta = {} if force else load_meta()
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    status, resp_headers, raw = get(URL, headers)
+    if status == 304:
+        print("Stations unchanged")
+        return
+    if status != 200:
+        raise RuntimeError(f"GET {URL} failed: HTTP {status}")
 
     stations = []
-    for line in text.splitlines():
-        if line.startswith("#") or not line.strip():
-            continue
-        parts = line.split("|")
-        if len(parts) < 7:
-            continue
-        sid = parts[0].strip()
-        ttype = parts[2].strip()
-        name = parts[4].strip()
-        loc_raw = parts[6].strip()
+    # NDBC tables are ASCII; scan the raw body and decode only the captured fields
+    for m in LINE_RE.finditer(raw):
+        sid, ttype, name, lat, ns, lon, ew = m.groups()
+        sid = sid.decode("utf-8", errors="replace")
+        ttype = ttype.strip().decode("utf-8", errors="replace")
+        name = name.strip().decode("utf-8", errors="replace")
 
         # Only buoy types
-        if not ttype or ttype.lower() not in BUOY_TYPES:
-            # Also accept if "buoy" appears in the type string
-            if "buoy" not in ttype.lower() and "dart" not in ttype.lower() and "rider" not in ttype.lower():
-                continue
-
-        # Parse lat/lon from the first part before the parenthetical
-        loc_simple = loc_raw.split("(")[0].strip()
-        lat, lon = parse_location(loc_simple)
-        if lat is None or (lat == 0 and lon == 0):
+        if not is_buoy_type(ttype):
+            continue
+
+        lat = float(lat) * (1 if ns == b'N' else -1)
+        lon = float(lon) * (1 if ew == b'E' else -1)
+        if lat == 0 and lon == 0:
             continue
 
         stations.append({
@@ -66,8 +109,16 @@ def main():
         })
 
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(json.dumps(stations, indent=2))
+    write_json(OUT, stations)
+    write_json(META, {
+        "etag": resp_headers.get("ETag"),
+        "last_modified": resp_headers.get("Last-Modified"),
+        "parser_version": PARSER_VERSION,
+    })
     print(f"Wrote {len(stations)} buoy stations to {OUT}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true",
+                        help="ignore cached validators and rebuild stations.json")
+    main(force=parser.parse_args().force)